@@ -1,79 +1,168 @@
 #!/bin/bash
-set -e
+set -eo pipefail
 
 # Configuration
 TEMPLATE="templates/guide_template.html"
 ORNAMENT_MARKER="ORNAMENT-MARKER-XYZ"
 # We use a pipe | as delimiter in perl, so no need to escape / in </div>
 ORNAMENT_HTML='<div class="ornament">✦ ✦ ✦</div>'
+# Maximum number of conversions in flight (defaults to the CPU count)
+MAX_JOBS="${HTML_JOBS:-$(getconf _NPROCESSORS_ONLN 2>/dev/null || echo 1)}"
+case "$MAX_JOBS" in
+    ''|*[!0-9]*) MAX_JOBS=0 ;;
+esac
+if [ "$MAX_JOBS" -lt 1 ]; then
+    echo "Error: HTML_JOBS must be a positive integer, got '$HTML_JOBS'." >&2
+    exit 2
+fi
+
+# Outputs newer than their sources (including the template and this script,
+# whose marker and filters shape every page) are skipped unless --force is
+# given
+FORCE=0
+for arg in "$@"; do
+    case "$arg" in
+        -f|--force) FORCE=1 ;;
+        *)
+            echo "Usage: $0 [--force]" >&2
+            exit 2
+            ;;
+    esac
+done
 
 echo "--- Starting HTML Build ---"
 
+# Succeeds if the output (first argument) is non-empty and newer than every
+# source that follows it, so the conversion can be skipped. An empty output
+# (e.g. left by an interrupted run) is always rebuilt.
+is_up_to_date() {
+    local out="$1"
+    shift
+    [ "$FORCE" -eq 0 ] && [ -s "$out" ] || return 1
+    local src
+    for src in "$@"; do
+        [ "$out" -nt "$src" ] || return 1
+    done
+}
+
 # Function to process TeX files
 process_tex() {
     local tex_file="$1"
-    local base_name=$(basename "$tex_file" .tex)
+    # Strip directory and extension in-shell rather than forking basename
+    local base_name="${tex_file##*/}"
+    base_name="${base_name%.tex}"
     local html_file="${base_name}.html"
-    local temp_tex="${base_name}.temp.tex"
-    
-    # Skip if it's a temp file
-    if [[ "$tex_file" == *".temp.tex" ]]; then return; fi
 
     echo "Converting $tex_file..."
     
-	    # 1. Pre-process LaTeX for Pandoc
-	    #    a. Replace bare \ornament lines with a unique marker that we can
-	    #       turn into a decorative divider in HTML.
-	    #    b. Treat verse "stanza breaks" (blank line after a line ending in \\)
-	    #       as real paragraph breaks by removing the trailing \\ in that
-	    #       position. This lets Pandoc emit separate <p> blocks, so stanza
-	    #       gaps appear in HTML the same way they do in the PDF.
-	    perl -0pe 's/^\s*\\ornament\s*$/'"$ORNAMENT_MARKER"'/mg' "$tex_file" | \
-	    perl -0pe 's/\\+\s*\n\s*\n/\n\n/g' > "$temp_tex"
-    
     # Derive title from filename (replace underscores with spaces)
     local title="${base_name//_/ }"
     
-    # 2. Run Pandoc
-    pandoc "$temp_tex" \
-        -o "$html_file" \
+    # 1. Pre-process LaTeX for Pandoc
+    #    a. Replace bare \ornament lines with a unique marker that we can
+    #       turn into a decorative divider in HTML.
+    #    b. Treat verse "stanza breaks" (blank line after a line ending in \\)
+    #       as real paragraph breaks by removing the trailing \\ in that
+    #       position. This lets Pandoc emit separate <p> blocks, so stanza
+    #       gaps appear in HTML the same way they do in the PDF.
+    #    Both substitutions run in a single perl process so the file is
+    #    slurped and the patterns compiled only once.
+    # 2. Run Pandoc on the pre-processed source streamed over stdin, so
+    #    no intermediate .temp.tex is written and read back from disk.
+    #    Reading stdin, pandoc cannot guess the format, so pass it.
+    # 3. Post-process: Replace the marker with the actual HTML ornament and
+    #    clean up the invalid HTML (div inside p) produced by pandoc wrapping
+    #    the marker. Pandoc's output is filtered on its way to disk, so the
+    #    HTML file is written exactly once instead of rewritten in place.
+    #    Only lines containing the marker can match, so a literal index()
+    #    check skips the regex engine for every other line.
+    #    Output goes to a temp file that replaces the page only on success,
+    #    so a failed conversion never truncates the existing HTML.
+    local tmp_html="$html_file.tmp.$$"
+    # Each call runs in its own background subshell, so these traps only
+    # affect this job: the temp file goes away however the job ends, and
+    # TERM (sent by the parent when the build is interrupted) exits
+    # before the mv below can publish a partial page.
+    trap "rm -f '$tmp_html'" EXIT
+    trap 'exit 143' TERM
+    if ! perl -0pe 's/^\s*\\ornament\s*$/'"$ORNAMENT_MARKER"'/mg; s/\\+\s*\n\s*\n/\n\n/g' "$tex_file" | \
+    pandoc \
+        --from=latex \
         --template="$TEMPLATE" \
         --to=html \
         --metadata title="$title" \
-        --standalone
-
-    # 3. Post-process: Replace the marker with the actual HTML ornament
-    # Using perl for robust in-place replacement with different delimiter
-    perl -i -pe "s|$ORNAMENT_MARKER|$ORNAMENT_HTML|g" "$html_file"
+        --standalone | \
+    perl -pe "if (index(\$_, '$ORNAMENT_MARKER') >= 0) { s|$ORNAMENT_MARKER|$ORNAMENT_HTML|g;"' s|<p>\s*(<div class="ornament">.*?</div>)\s*</p>|$1|g }' > "$tmp_html"; then
+        return 1
+    fi
+    mv "$tmp_html" "$html_file"
     
-    # Cleanup invalid HTML (div inside p) produced by pandoc wrapping the marker
-    perl -i -pe 's|<p>\s*(<div class="ornament">.*?</div>)\s*</p>|$1|g' "$html_file"
-    
-    # Cleanup
-    rm "$temp_tex"
     echo "✓ Generated $html_file"
 }
 
+# Each file converts independently, so run the conversions as background
+# jobs and collect their PIDs; the build fails if any job fails. At most
+# MAX_JOBS run at once: when the pool is full, reap the oldest job before
+# starting the next one.
+pids=()
+status=0
+
+# On Ctrl-C or TERM, stop the running jobs and sweep any temp pages they
+# left behind (all jobs share this shell's $$ in their temp file names).
+# Background jobs ignore SIGINT in a non-interactive shell, so they are
+# sent TERM explicitly.
+stop_jobs() {
+    if [ "${#pids[@]}" -gt 0 ]; then
+        kill "${pids[@]}" 2>/dev/null || true
+    fi
+    wait 2>/dev/null || true
+    rm -f ./*.html.tmp."$$"
+}
+trap 'stop_jobs; exit 130' INT
+trap 'stop_jobs; exit 143' TERM
+
 # Process all .tex files in the root directory
 for f in *.tex; do
-	# Skip temporary/debug TeX files
-	if [[ "$f" == debug_* ]]; then
-		continue
-	fi
-	# Check if file exists to avoid errors if no matches
-	[ -e "$f" ] || continue
-	process_tex "$f"
+    # Skip temporary/debug TeX files (one pattern dispatch per file)
+    case "$f" in
+        debug_*|*.temp.tex) continue ;;
+    esac
+    # Check if file exists to avoid errors if no matches
+    [ -e "$f" ] || continue
+    if is_up_to_date "${f%.tex}.html" "$f" "$TEMPLATE" "${BASH_SOURCE[0]}"; then
+        echo "Skipping $f (up to date)"
+        continue
+    fi
+    if [ "${#pids[@]}" -ge "$MAX_JOBS" ]; then
+        wait "${pids[0]}" || status=1
+        pids=("${pids[@]:1}")
+    fi
+    process_tex "$f" &
+    pids+=("$!")
 done
 
 # Process the Guide (Markdown)
-if [ -f "living-way-guide.md" ]; then
+if [ -f "living-way-guide.md" ] && \
+    ! is_up_to_date living_way_guide.html living-way-guide.md "$TEMPLATE" "${BASH_SOURCE[0]}"; then
     echo "Converting living-way-guide.md..."
-    pandoc living-way-guide.md \
+    # Record a failure rather than exiting, so the TeX jobs still get reaped
+    if pandoc living-way-guide.md \
         -o living_way_guide.html \
         --template="$TEMPLATE" \
         --metadata title="A Guide to The Way of the Living Jesus" \
-        --standalone
-    echo "✓ Generated living_way_guide.html"
+        --standalone; then
+        echo "✓ Generated living_way_guide.html"
+    else
+        status=1
+    fi
+fi
+
+for pid in "${pids[@]}"; do
+    wait "$pid" || status=1
+done
+if [ "$status" -ne 0 ]; then
+    echo "Error: one or more HTML conversions failed." >&2
+    exit "$status"
 fi
 
 echo "--- HTML Build Complete ---"